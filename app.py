@@ -1,25 +1,380 @@
 # app.py
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, request, abort, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-from models import db, Child, DailyIntake, OPDReport
-from recommender import evaluate_intake
-from datetime import datetime
+from models import db, Child, DailyIntake, OPDReport, RecommendationCache
+from recommender import evaluate_intake, summarize_intakes
+from sqlalchemy import select, insert, event, func, bindparam, literal, type_coerce, Text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date
+from functools import lru_cache
+from types import SimpleNamespace
+import gzip
+import hashlib
 import os
+import orjson
+import zlib
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Route request parsing and any jsonify() calls through orjson"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Write orjson's bytes straight into the body instead of the base
+        # class's dumps() -> str -> encode round-trip
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype=self.mimetype)
+
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)  # Enable CORS for frontend communication
 
 # Configuration
 app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///malnutrition.db"
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 app.config["SECRET_KEY"] = "your-secret-key-here"
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+    "pool_size": 10,
+    "max_overflow": 20,
+    "pool_pre_ping": True,
+    # JSON columns (meal_items, cached recommendation payloads) go through orjson
+    "json_serializer": lambda obj: orjson.dumps(obj).decode(),
+    "json_deserializer": orjson.loads,
+}
+
+# History endpoints stream rows in batches; an explicit ?limit= is capped
+STREAM_BATCH_SIZE = 500
+MAX_PAGE_SIZE = 1000
+# Streamed JSON is gzipped on the fly for clients that accept it
+GZIP_LEVEL = 4
+
+# Number of most recent intakes the recommender evaluates / the stats average
+RECENT_INTAKE_WINDOW = 7
+STATS_INTAKE_WINDOW = 30
+# evaluate_intake only reads the latest two OPD reports
+RECENT_OPD_WINDOW = 2
+
+# Recommendations after a write are computed off the request thread
+EXECUTOR = ThreadPoolExecutor(max_workers=4)
 
 # Initialize database
 db.init_app(app)
 
+
+def _set_sqlite_pragmas(dbapi_conn, _):
+    """WAL lets readers run alongside writes; NORMAL sync saves an fsync per commit"""
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.execute("PRAGMA mmap_size=268435456")
+    cur.execute("PRAGMA cache_size=-65536")  # 64 MiB page cache per connection
+    cur.close()
+
+
 # Create tables
 with app.app_context():
+    event.listen(db.engine, "connect", _set_sqlite_pragmas)
     db.create_all()
+    # create_all skips tables that already exist, so add any missing indexes
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+    # Don't let import-time connections leak into forked WSGI workers
+    db.engine.dispose()
+
+# ==================== HELPERS ====================
+
+# Column sets for the list endpoints. They are plain Core table columns, so
+# the selects skip ORM instance construction and the ORM result layer; the
+# models' row_to_dict() serializes the plain rows
+_child_c = Child.__table__.c
+_intake_c = DailyIntake.__table__.c
+_opd_c = OPDReport.__table__.c
+CHILD_COLUMNS = (_child_c.id, _child_c.name, _child_c.date_of_birth, _child_c.sex)
+# meal_items is read as its stored JSON text and passed through unparsed
+INTAKE_COLUMNS = (_intake_c.id, _intake_c.child_id, _intake_c.date,
+                  type_coerce(_intake_c.meal_items, Text).label("meal_items"),
+                  _intake_c.total_calories, _intake_c.total_protein)
+OPD_COLUMNS = (_opd_c.id, _opd_c.child_id, _opd_c.date, _opd_c.weight_kg,
+               _opd_c.height_cm, _opd_c.muac_cm, _opd_c.notes)
+
+# Statements reused by every request; child_id is bound at execution so
+# SQLAlchemy's compiled cache is hit instead of rebuilding each query
+CHILDREN_STMT = select(*CHILD_COLUMNS)
+INTAKE_HISTORY_STMT = select(*INTAKE_COLUMNS)\
+    .where(_intake_c.child_id == bindparam("child_id"))\
+    .order_by(_intake_c.date.asc())
+OPD_HISTORY_STMT = select(*OPD_COLUMNS)\
+    .where(_opd_c.child_id == bindparam("child_id"))\
+    .order_by(_opd_c.date.asc())
+# The recommender only reads these fields, so fetch them as plain mappings
+RECENT_INTAKES_STMT = select(_intake_c.total_calories, _intake_c.total_protein)\
+    .where(_intake_c.child_id == bindparam("child_id"))\
+    .order_by(_intake_c.date.desc())\
+    .limit(RECENT_INTAKE_WINDOW)
+# Latest report plus the one before it, for the growth trend (newest first)
+RECENT_OPDS_STMT = select(_opd_c.date, _opd_c.weight_kg, _opd_c.height_cm, _opd_c.muac_cm)\
+    .where(_opd_c.child_id == bindparam("child_id"))\
+    .order_by(_opd_c.date.desc())\
+    .limit(RECENT_OPD_WINDOW)
+# Tips are (max id, count, newest created_at). SQLite hands a deleted newest
+# rowid to the next insert, so id and count alone can repeat; created_at
+# tells the rows apart. Every ETag and recommendation key is built from these
+TIP_STMTS = {
+    model: select(func.max(model.id), func.count(), func.max(model.created_at))
+    .where(model.child_id == bindparam("child_id"))
+    for model in (DailyIntake, OPDReport)
+}
+CHILDREN_TIP_STMT = select(func.max(_child_c.id), func.count(), func.max(_child_c.created_at))
+CHILD_EXISTS_STMT = select(literal(1)).where(_child_c.id == bindparam("child_id"))
+_stats_window = select(_intake_c.total_calories, _intake_c.total_protein)\
+    .where(_intake_c.child_id == bindparam("child_id"))\
+    .order_by(_intake_c.date.desc())\
+    .limit(STATS_INTAKE_WINDOW)\
+    .subquery()
+STATS_INTAKE_SUMMARY_STMT = select(
+    func.count(),
+    func.avg(_stats_window.c.total_calories),
+    func.avg(_stats_window.c.total_protein)
+).select_from(_stats_window)
+LATEST_OPD_STMT = select(_opd_c.weight_kg, _opd_c.height_cm, _opd_c.muac_cm)\
+    .where(_opd_c.child_id == bindparam("child_id"))\
+    .order_by(_opd_c.date.desc())\
+    .limit(1)
+# The child's created_at plus both tips for the recommendation key in a
+# single round-trip; the payload depends on the child row (its age), and a
+# recreated child can reuse a deleted one's id while having no history yet
+_recommendation_tips = (
+    select(_child_c.created_at).where(_child_c.id == bindparam("child_id")).scalar_subquery(),
+    *(
+        select(agg).where(model.child_id == bindparam("child_id")).scalar_subquery()
+        for model in (DailyIntake, OPDReport)
+        for agg in (func.max(model.id), func.count(model.id), func.max(model.created_at))
+    )
+)
+RECOMMENDATION_TIPS_STMT = select(*_recommendation_tips)
+# GET /recommend also reads the stored version and raw payload JSON in the
+# same round-trip, so a warm cache is served with a single query
+RECOMMENDATION_STATE_STMT = select(*_recommendation_tips, *(
+    select(col).where(RecommendationCache.child_id == bindparam("child_id")).scalar_subquery()
+    for col in (RecommendationCache.version, type_coerce(RecommendationCache.payload, Text))
+))
+
+
+def _json(obj, status=200):
+    """Serialize obj with orjson (dates encode natively) into a JSON response"""
+    return app.response_class(orjson.dumps(obj), status=status, mimetype="application/json")
+
+
+def _with_etag(etag, build_response):
+    """Answer 304 if the client already holds etag, otherwise build and tag the response
+
+    The tags come from the cheap tip aggregates, so an unchanged dashboard
+    poll skips the fetch and serialization entirely. no-cache makes browsers
+    revalidate on every request instead of reusing stale data.
+    """
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+    else:
+        response = build_response()
+    response.set_etag(etag, weak=True)
+    response.cache_control.no_cache = True
+    return response
+
+
+def _paginate(stmt):
+    """Apply optional ?limit=&offset= query args, capping limit at MAX_PAGE_SIZE"""
+    limit = request.args.get("limit", type=int)
+    offset = request.args.get("offset", 0, type=int)
+    if limit is not None:
+        stmt = stmt.limit(min(max(limit, 0), MAX_PAGE_SIZE))
+    if offset > 0:
+        stmt = stmt.offset(offset)
+    return stmt
+
+
+def _accepts_gzip():
+    """True if the request's Accept-Encoding allows gzip"""
+    return request.accept_encodings["gzip"] > 0
+
+
+def _gzip_stream(chunks):
+    """Compress an iterable of byte chunks into one gzip member as it is produced"""
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _stream_json_array(stmt, params, serialize):
+    """Stream a column select as a JSON array, fetching STREAM_BATCH_SIZE rows at a time
+
+    Each fetched batch is encoded with a single orjson call and sent as
+    one chunk, rather than one dumps() call and yield per row.
+    """
+    def generate():
+        yield b"["
+        separator = b""
+        result = db.session.execute(stmt.execution_options(yield_per=STREAM_BATCH_SIZE), params)
+        for batch in result.partitions():
+            # Drop the batch's own brackets so the chunks join into one array
+            yield separator + orjson.dumps([serialize(row) for row in batch])[1:-1]
+            separator = b","
+        yield b"]"
+
+    body = generate()
+    gzipped = _accepts_gzip()
+    if gzipped:
+        body = _gzip_stream(body)
+    response = app.response_class(stream_with_context(body), mimetype="application/json")
+    if gzipped:
+        response.content_encoding = "gzip"
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def _intake_row_to_dict(row):
+    """DailyIntake.row_to_dict for INTAKE_COLUMNS rows, embedding meal_items JSON as-is"""
+    data = DailyIntake.row_to_dict(row)
+    if row.meal_items in (None, "null"):
+        data["meal_items"] = []
+    else:
+        data["meal_items"] = orjson.Fragment(row.meal_items)
+    return data
+
+
+@lru_cache(maxsize=512)
+def _parse_date(value):
+    """Parse a YYYY-MM-DD string, tolerating full ISO datetimes from older clients
+
+    Clients post the same few dates over and over, and date objects are
+    immutable, so parses are memoized.
+    """
+    if "T" in value or " " in value:
+        return datetime.fromisoformat(value).date()
+    return date.fromisoformat(value)
+
+
+def _recommendation_bundle(child_id, today=None):
+    """Load the recent-intake window and OPD reports for a child and evaluate them
+
+    Every recommendation path (POST refresh, GET /recommend) funnels
+    through here. It reads only the last RECENT_INTAKE_WINDOW intakes and
+    RECENT_OPD_WINDOW OPD reports rather than the child's whole history.
+    """
+    child = db.session.get(Child, child_id)
+    if child is None:
+        abort(404)
+    params = {"child_id": child_id}
+    intakes = db.session.execute(RECENT_INTAKES_STMT, params).mappings().all()
+    # evaluate_intake expects date order, oldest first
+    opds = db.session.execute(RECENT_OPDS_STMT, params).mappings().all()[::-1]
+    return evaluate_intake(
+        child.to_dict(),
+        intakes,
+        opds,
+        stats=summarize_intakes(intakes),
+        today=today
+    )
+
+
+def _history_tip(model, child_id):
+    """(max id, row count, newest created_at) of a child's rows; changes on every insert or delete"""
+    return tuple(db.session.execute(TIP_STMTS[model], {"child_id": child_id}).one())
+
+
+def _ensure_child_exists(child_id):
+    """404 unless the child exists; only needed when its history came back empty"""
+    if db.session.execute(CHILD_EXISTS_STMT, {"child_id": child_id}).scalar() is None:
+        abort(404)
+
+
+@lru_cache(maxsize=1)
+def _children_json(tip, today):
+    """Serialized children list for one (max id, count, newest created_at) tip and day"""
+    rows = db.session.execute(CHILDREN_STMT).all()
+    return orjson.dumps([Child.row_to_dict(r) for r in rows])
+
+
+@lru_cache(maxsize=1024)
+def _cached_recommendation(child_id, child_created, intake_tip, opd_tip, today):
+    """orjson-encoded evaluate_intake result for one version of a child's data
+
+    The child's created_at, the tips and today's date (ages move daily) form
+    the cache key, so a write or a recreated child naturally lands on a fresh
+    entry and stale ones age out. Entries hold the encoded bytes, so a hit is
+    served without re-serializing.
+    """
+    return orjson.dumps(_recommendation_bundle(child_id, today))
+
+
+def _recommendation_key(child_id):
+    """The child's created_at, both history tips and today's date; one recommendation version"""
+    row = db.session.execute(RECOMMENDATION_TIPS_STMT, {"child_id": child_id}).one()
+    return row[0], tuple(row[1:4]), tuple(row[4:7]), date.today()
+
+
+def _recommendation_state(child_id):
+    """The recommendation key plus the stored (version, payload JSON text), or Nones"""
+    row = db.session.execute(RECOMMENDATION_STATE_STMT, {"child_id": child_id}).one()
+    return (row[0], tuple(row[1:4]), tuple(row[4:7]), date.today()), row[7], row[8]
+
+
+def _tip_tag(tip):
+    """Render a tip as a space-free token, datetimes as epoch seconds"""
+    return "-".join(str(v.timestamp() if isinstance(v, datetime) else v) for v in tip)
+
+
+def _key_version(key):
+    """Flatten a recommendation key into the string stored in RecommendationCache"""
+    child_created, intake_tip, opd_tip, today = key
+    return f"{_tip_tag((child_created,))}/{_tip_tag(intake_tip)}/{_tip_tag(opd_tip)}/{today.isoformat()}"
+
+
+def _recommendation_for(child_id, key=None):
+    """Current recommendation JSON bytes for a child, recomputed only when its data changed"""
+    if key is None:
+        key = _recommendation_key(child_id)
+    return _cached_recommendation(child_id, *key)
+
+
+def _compute_and_store_recommendation(child_id):
+    """Background job: refresh the stored recommendation after an intake/OPD write"""
+    with app.app_context():
+        try:
+            key = _recommendation_key(child_id)
+            body = _recommendation_for(child_id, key)
+            stmt = sqlite_insert(RecommendationCache).values(
+                child_id=child_id,
+                version=_key_version(key),
+                # Already JSON; store the text as-is instead of decoding and re-encoding it
+                payload=type_coerce(body.decode(), Text),
+                updated_at=datetime.utcnow()
+            )
+            db.session.execute(stmt.on_conflict_do_update(
+                index_elements=[RecommendationCache.child_id],
+                set_={
+                    "version": stmt.excluded.version,
+                    "payload": stmt.excluded.payload,
+                    "updated_at": stmt.excluded.updated_at
+                }
+            ))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            app.logger.exception("Failed to refresh recommendation for child %s", child_id)
+
 
 # ==================== API ENDPOINTS ====================
 
@@ -28,33 +383,37 @@ with app.app_context():
 def create_child():
     """Create a new child profile"""
     try:
-        data = request.get_json()
+        data = request.get_json(cache=False)
         
         name = data.get("name")
-        dob = datetime.fromisoformat(data.get("date_of_birth")).date()
+        dob = _parse_date(data.get("date_of_birth"))
         sex = data.get("sex", "unknown")
         
         child = Child(name=name, date_of_birth=dob, sex=sex)
         db.session.add(child)
         db.session.commit()
         
-        return jsonify({
+        return _json({
             "message": "Child added successfully",
             "child": child.to_dict()
-        }), 201
+        }, 201)
     except Exception as e:
         db.session.rollback()
-        return jsonify({"error": str(e)}), 400
+        return _json({"error": str(e)}, 400)
 
 
 @app.route("/api/children", methods=["GET"])
 def list_children():
     """Get all children"""
     try:
-        children = Child.query.all()
-        return jsonify([c.to_dict() for c in children]), 200
+        tip = tuple(db.session.execute(CHILDREN_TIP_STMT).one())
+        today = date.today()
+        etag = "children-" + _tip_tag(tip) + "-" + today.isoformat()
+        return _with_etag(etag, lambda: app.response_class(
+            _children_json(tip, today), mimetype="application/json"
+        ))
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return _json({"error": str(e)}, 400)
 
 
 @app.route("/api/children/<int:child_id>", methods=["GET"])
@@ -62,9 +421,9 @@ def get_child(child_id):
     """Get specific child details"""
     try:
         child = Child.query.get_or_404(child_id)
-        return jsonify(child.to_dict()), 200
+        return _json(child.to_dict(), 200)
     except Exception as e:
-        return jsonify({"error": str(e)}), 404
+        return _json({"error": str(e)}, 404)
 
 
 @app.route("/api/children/<int:child_id>", methods=["DELETE"])
@@ -74,70 +433,67 @@ def delete_child(child_id):
         child = Child.query.get_or_404(child_id)
         db.session.delete(child)
         db.session.commit()
-        return jsonify({"message": "Child deleted successfully"}), 200
+        return _json({"message": "Child deleted successfully"}, 200)
     except Exception as e:
         db.session.rollback()
-        return jsonify({"error": str(e)}), 400
+        return _json({"error": str(e)}, 400)
 
 
 # --- Daily Intake Management ---
 @app.route("/api/children/<int:child_id>/intake", methods=["POST"])
 def add_intake_and_recommend(child_id):
-    """Add daily intake and get immediate recommendations"""
+    """Add daily intake and queue a recommendation refresh"""
     try:
-        child = Child.query.get_or_404(child_id)
-        data = request.get_json()
+        db.get_or_404(Child, child_id)
+        data = request.get_json(cache=False)
         
         # Parse intake data
-        dt = datetime.fromisoformat(data["date"]).date()
+        dt = _parse_date(data["date"])
         meal_items = data.get("meal_items", [])
         total_calories = float(data.get("total_calories", 0.0))
         total_protein = float(data.get("total_protein", 0.0))
         
-        # Create intake record
-        intake = DailyIntake(
-            child_id=child_id,
-            date=dt,
-            meal_items=meal_items,
-            total_calories=total_calories,
-            total_protein=total_protein
-        )
-        db.session.add(intake)
+        # Create intake record; only the new id comes back via RETURNING, so
+        # the response is built without an ORM object or a refresh SELECT
+        values = {
+            "child_id": child_id,
+            "date": dt,
+            "meal_items": meal_items,
+            "total_calories": total_calories,
+            "total_protein": total_protein
+        }
+        intake_id = db.session.execute(
+            insert(DailyIntake).values(values).returning(DailyIntake.id)
+        ).scalar_one()
         db.session.commit()
+        intake = DailyIntake.row_to_dict(SimpleNamespace(id=intake_id, **values))
         
-        # Fetch recent data for recommendations
-        intakes = DailyIntake.query.filter_by(child_id=child_id)\
-            .order_by(DailyIntake.date.desc()).limit(14).all()
-        opds = OPDReport.query.filter_by(child_id=child_id)\
-            .order_by(OPDReport.date.asc()).all()
-        
-        # Generate recommendations
-        result = evaluate_intake(
-            child.to_dict(),
-            [i.to_dict() for i in intakes][:7],
-            [o.to_dict() for o in opds]
-        )
+        # Recommendations are refreshed in the background; GET /recommend serves them
+        EXECUTOR.submit(_compute_and_store_recommendation, child_id)
         
-        return jsonify({
+        return _json({
             "message": "Intake recorded successfully",
-            "intake": intake.to_dict(),
-            "recommendation": result
-        }), 201
+            "intake": intake,
+            "recommendation_pending": True
+        }, 201)
     except Exception as e:
         db.session.rollback()
-        return jsonify({"error": str(e)}), 400
+        return _json({"error": str(e)}, 400)
 
 
 @app.route("/api/children/<int:child_id>/intake", methods=["GET"])
 def get_intakes(child_id):
     """Get all intake records for a child"""
     try:
-        Child.query.get_or_404(child_id)
-        records = DailyIntake.query.filter_by(child_id=child_id)\
-            .order_by(DailyIntake.date.asc()).all()
-        return jsonify([r.to_dict() for r in records]), 200
+        tip = _history_tip(DailyIntake, child_id)
+        if not tip[1]:
+            _ensure_child_exists(child_id)
+        etag = "intake-" + _tip_tag(tip)
+        return _with_etag(etag, lambda: _stream_json_array(
+            _paginate(INTAKE_HISTORY_STMT), {"child_id": child_id}, _intake_row_to_dict
+        ))
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return _json({"error": str(e)}, 400)
 
 
 @app.route("/api/children/<int:child_id>/intake/<int:intake_id>", methods=["DELETE"])
@@ -147,72 +503,68 @@ def delete_intake(child_id, intake_id):
         intake = DailyIntake.query.filter_by(id=intake_id, child_id=child_id).first_or_404()
         db.session.delete(intake)
         db.session.commit()
-        return jsonify({"message": "Intake deleted successfully"}), 200
+        return _json({"message": "Intake deleted successfully"}, 200)
     except Exception as e:
         db.session.rollback()
-        return jsonify({"error": str(e)}), 400
+        return _json({"error": str(e)}, 400)
 
 
 # --- OPD Report Management ---
 @app.route("/api/children/<int:child_id>/opd", methods=["POST"])
 def add_opd_and_recommend(child_id):
-    """Add OPD report and get immediate recommendations"""
+    """Add OPD report and queue a recommendation refresh"""
     try:
-        child = Child.query.get_or_404(child_id)
-        data = request.get_json()
+        db.get_or_404(Child, child_id)
+        data = request.get_json(cache=False)
         
         # Parse OPD data
-        dt = datetime.fromisoformat(data["date"]).date()
+        dt = _parse_date(data["date"])
         weight = float(data["weight_kg"])
         height = float(data["height_cm"])
         muac = float(data["muac_cm"]) if data.get("muac_cm") else None
         notes = data.get("notes", "")
         
         # Create OPD record
-        opd = OPDReport(
-            child_id=child_id,
-            date=dt,
-            weight_kg=weight,
-            height_cm=height,
-            muac_cm=muac,
-            notes=notes
-        )
-        db.session.add(opd)
+        values = {
+            "child_id": child_id,
+            "date": dt,
+            "weight_kg": weight,
+            "height_cm": height,
+            "muac_cm": muac,
+            "notes": notes
+        }
+        opd_id = db.session.execute(
+            insert(OPDReport).values(values).returning(OPDReport.id)
+        ).scalar_one()
         db.session.commit()
+        opd = OPDReport.row_to_dict(SimpleNamespace(id=opd_id, **values))
         
-        # Fetch recent data for recommendations
-        intakes = DailyIntake.query.filter_by(child_id=child_id)\
-            .order_by(DailyIntake.date.desc()).limit(14).all()
-        opds = OPDReport.query.filter_by(child_id=child_id)\
-            .order_by(OPDReport.date.asc()).all()
-        
-        # Generate recommendations
-        result = evaluate_intake(
-            child.to_dict(),
-            [i.to_dict() for i in intakes][:7],
-            [o.to_dict() for o in opds]
-        )
+        # Recommendations are refreshed in the background; GET /recommend serves them
+        EXECUTOR.submit(_compute_and_store_recommendation, child_id)
         
-        return jsonify({
+        return _json({
             "message": "OPD report recorded successfully",
-            "opd": opd.to_dict(),
-            "recommendation": result
-        }), 201
+            "opd": opd,
+            "recommendation_pending": True
+        }, 201)
     except Exception as e:
         db.session.rollback()
-        return jsonify({"error": str(e)}), 400
+        return _json({"error": str(e)}, 400)
 
 
 @app.route("/api/children/<int:child_id>/opd", methods=["GET"])
 def get_opds(child_id):
     """Get all OPD reports for a child"""
     try:
-        Child.query.get_or_404(child_id)
-        records = OPDReport.query.filter_by(child_id=child_id)\
-            .order_by(OPDReport.date.asc()).all()
-        return jsonify([r.to_dict() for r in records]), 200
+        tip = _history_tip(OPDReport, child_id)
+        if not tip[1]:
+            _ensure_child_exists(child_id)
+        etag = "opd-" + _tip_tag(tip)
+        return _with_etag(etag, lambda: _stream_json_array(
+            _paginate(OPD_HISTORY_STMT), {"child_id": child_id}, OPDReport.row_to_dict
+        ))
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return _json({"error": str(e)}, 400)
 
 
 @app.route("/api/children/<int:child_id>/opd/<int:opd_id>", methods=["DELETE"])
@@ -222,10 +574,10 @@ def delete_opd(child_id, opd_id):
         opd = OPDReport.query.filter_by(id=opd_id, child_id=child_id).first_or_404()
         db.session.delete(opd)
         db.session.commit()
-        return jsonify({"message": "OPD report deleted successfully"}), 200
+        return _json({"message": "OPD report deleted successfully"}, 200)
     except Exception as e:
         db.session.rollback()
-        return jsonify({"error": str(e)}), 400
+        return _json({"error": str(e)}, 400)
 
 
 # --- Recommendations ---
@@ -233,22 +585,17 @@ def delete_opd(child_id, opd_id):
 def recommend(child_id):
     """Get recommendations without adding new data"""
     try:
-        child = Child.query.get_or_404(child_id)
-        
-        intakes = DailyIntake.query.filter_by(child_id=child_id)\
-            .order_by(DailyIntake.date.desc()).limit(14).all()
-        opds = OPDReport.query.filter_by(child_id=child_id)\
-            .order_by(OPDReport.date.asc()).all()
+        key, stored_version, stored_payload = _recommendation_state(child_id)
+        version = _key_version(key)
         
-        result = evaluate_intake(
-            child.to_dict(),
-            [i.to_dict() for i in intakes][:7],
-            [o.to_dict() for o in opds]
-        )
+        def build():
+            if stored_version == version:
+                return app.response_class(stored_payload, mimetype="application/json")
+            return app.response_class(_recommendation_for(child_id, key), mimetype="application/json")
         
-        return jsonify(result), 200
+        return _with_etag(f"rec-{child_id}-{version}", build)
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return _json({"error": str(e)}, 400)
 
 
 # --- Dashboard Statistics ---
@@ -256,839 +603,84 @@ def recommend(child_id):
 def get_stats(child_id):
     """Get comprehensive statistics for a child"""
     try:
-        child = Child.query.get_or_404(child_id)
+        child = db.get_or_404(Child, child_id)
+        params = {"child_id": child_id}
         
-        # Get recent intakes (last 30 days)
-        intakes = DailyIntake.query.filter_by(child_id=child_id)\
-            .order_by(DailyIntake.date.desc()).limit(30).all()
-        
-        # Get all OPD reports
-        opds = OPDReport.query.filter_by(child_id=child_id)\
-            .order_by(OPDReport.date.desc()).all()
+        # Averages over the last 30 intake records, computed by SQLite
+        intake_count, avg_calories, avg_protein = db.session.execute(STATS_INTAKE_SUMMARY_STMT, params).one()
+        opd_count = _history_tip(OPDReport, child_id)[1]
+        latest_opd = db.session.execute(LATEST_OPD_STMT, params).first()
         
         stats = {
             "child": child.to_dict(),
             "intake_summary": {
-                "total_records": len(intakes),
-                "avg_calories": sum(i.total_calories for i in intakes) / len(intakes) if intakes else 0,
-                "avg_protein": sum(i.total_protein for i in intakes) / len(intakes) if intakes else 0,
+                "total_records": intake_count,
+                "avg_calories": avg_calories if avg_calories is not None else 0,
+                "avg_protein": avg_protein if avg_protein is not None else 0,
             },
             "opd_summary": {
-                "total_records": len(opds),
-                "latest_weight": opds[0].weight_kg if opds else None,
-                "latest_height": opds[0].height_cm if opds else None,
-                "latest_muac": opds[0].muac_cm if opds else None,
+                "total_records": opd_count,
+                "latest_weight": latest_opd.weight_kg if latest_opd else None,
+                "latest_height": latest_opd.height_cm if latest_opd else None,
+                "latest_muac": latest_opd.muac_cm if latest_opd else None,
             }
         }
         
-        return jsonify(stats), 200
+        return _json(stats, 200)
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return _json({"error": str(e)}, 400)
 
 
 # ==================== FRONTEND ROUTES ====================
 
-@app.route("/")
-def index():
-    """Serve the main dashboard"""
-    html = """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Child Nutrition Dashboard</title>
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        
-        body {
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            padding: 20px;
-        }
-        
-        .container { max-width: 1400px; margin: 0 auto; }
-        
-        .header {
-            background: white;
-            padding: 30px;
-            border-radius: 15px;
-            margin-bottom: 30px;
-            box-shadow: 0 10px 30px rgba(0,0,0,0.1);
-        }
-        
-        .header h1 {
-            color: #667eea;
-            font-size: 2.5em;
-            margin-bottom: 10px;
-        }
-        
-        .header p {
-            color: #666;
-            font-size: 1.1em;
-        }
-        
-        .main-grid {
-            display: grid;
-            grid-template-columns: 350px 1fr;
-            gap: 30px;
-            margin-bottom: 30px;
-        }
-        
-        .sidebar {
-            display: flex;
-            flex-direction: column;
-            gap: 20px;
-        }
-        
-        .card {
-            background: white;
-            padding: 25px;
-            border-radius: 15px;
-            box-shadow: 0 10px 30px rgba(0,0,0,0.1);
-        }
-        
-        .card h2 {
-            color: #333;
-            margin-bottom: 20px;
-            font-size: 1.5em;
-            border-bottom: 2px solid #667eea;
-            padding-bottom: 10px;
-        }
-        
-        .form-group {
-            margin-bottom: 15px;
-        }
-        
-        .form-group label {
-            display: block;
-            margin-bottom: 5px;
-            color: #555;
-            font-weight: 600;
-        }
-        
-        .form-group input,
-        .form-group select,
-        .form-group textarea {
-            width: 100%;
-            padding: 12px;
-            border: 2px solid #e0e0e0;
-            border-radius: 8px;
-            font-size: 1em;
-            transition: border-color 0.3s;
-        }
-        
-        .form-group input:focus,
-        .form-group select:focus,
-        .form-group textarea:focus {
-            outline: none;
-            border-color: #667eea;
-        }
-        
-        .btn {
-            width: 100%;
-            padding: 14px;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            border: none;
-            border-radius: 8px;
-            font-size: 1em;
-            font-weight: 600;
-            cursor: pointer;
-            transition: transform 0.2s;
-        }
-        
-        .btn:hover {
-            transform: translateY(-2px);
-        }
-        
-        .btn:active {
-            transform: translateY(0);
-        }
-        
-        .child-selector {
-            display: flex;
-            gap: 10px;
-            margin-bottom: 20px;
-        }
-        
-        .child-selector select {
-            flex: 1;
-        }
-        
-        .child-selector button {
-            padding: 12px 20px;
-            background: #4CAF50;
-            color: white;
-            border: none;
-            border-radius: 8px;
-            cursor: pointer;
-            font-weight: 600;
-        }
-        
-        .tabs {
-            display: flex;
-            gap: 10px;
-            margin-bottom: 20px;
-        }
-        
-        .tab {
-            flex: 1;
-            padding: 12px;
-            background: #f5f5f5;
-            border: none;
-            border-radius: 8px;
-            cursor: pointer;
-            font-weight: 600;
-            transition: all 0.3s;
-        }
-        
-        .tab.active {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-        }
-        
-        .tab-content {
-            display: none;
-        }
-        
-        .tab-content.active {
-            display: block;
-        }
-        
-        .meal-item {
-            display: flex;
-            gap: 10px;
-            margin-bottom: 10px;
-            align-items: center;
-        }
-        
-        .meal-item input {
-            flex: 1;
-        }
-        
-        .meal-item button {
-            padding: 10px 15px;
-            background: #f44336;
-            color: white;
-            border: none;
-            border-radius: 6px;
-            cursor: pointer;
-        }
-        
-        .add-meal-btn {
-            width: 100%;
-            padding: 10px;
-            background: #4CAF50;
-            color: white;
-            border: none;
-            border-radius: 8px;
-            cursor: pointer;
-            margin-top: 10px;
-        }
-        
-        .dashboard-content {
-            display: grid;
-            gap: 20px;
-        }
-        
-        .recommendation-card {
-            background: white;
-            padding: 25px;
-            border-radius: 15px;
-            box-shadow: 0 10px 30px rgba(0,0,0,0.1);
-        }
-        
-        .recommendation-card h3 {
-            color: #667eea;
-            margin-bottom: 15px;
-            font-size: 1.3em;
-        }
-        
-        .alert {
-            padding: 15px;
-            border-radius: 8px;
-            margin-bottom: 10px;
-            line-height: 1.6;
-        }
-        
-        .alert-warning {
-            background: #fff3cd;
-            border-left: 4px solid #ffc107;
-            color: #856404;
-        }
-        
-        .alert-success {
-            background: #d4edda;
-            border-left: 4px solid #28a745;
-            color: #155724;
-        }
-        
-        .alert-info {
-            background: #d1ecf1;
-            border-left: 4px solid #17a2b8;
-            color: #0c5460;
-        }
-        
-        .alert-danger {
-            background: #f8d7da;
-            border-left: 4px solid #dc3545;
-            color: #721c24;
-        }
-        
-        .stats-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-            gap: 15px;
-            margin-bottom: 20px;
-        }
-        
-        .stat-card {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 20px;
-            border-radius: 10px;
-            text-align: center;
-        }
-        
-        .stat-card h4 {
-            font-size: 0.9em;
-            opacity: 0.9;
-            margin-bottom: 5px;
-        }
-        
-        .stat-card .value {
-            font-size: 2em;
-            font-weight: bold;
-        }
-        
-        .history-list {
-            max-height: 400px;
-            overflow-y: auto;
-        }
-        
-        .history-item {
-            background: #f8f9ff;
-            padding: 15px;
-            border-radius: 8px;
-            margin-bottom: 10px;
-            border-left: 4px solid #667eea;
-        }
-        
-        .history-item .date {
-            font-weight: 600;
-            color: #667eea;
-            margin-bottom: 5px;
-        }
-        
-        .history-item .details {
-            color: #666;
-            font-size: 0.9em;
-        }
-        
-        .modal {
-            display: none;
-            position: fixed;
-            top: 0;
-            left: 0;
-            right: 0;
-            bottom: 0;
-            background: rgba(0,0,0,0.5);
-            z-index: 1000;
-            align-items: center;
-            justify-content: center;
-        }
-        
-        .modal.show {
-            display: flex;
-        }
-        
-        @media (max-width: 1024px) {
-            .main-grid {
-                grid-template-columns: 1fr;
-            }
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>🍎 Child Nutrition Tracker</h1>
-            <p>Monitor and improve your child's nutritional health with AI-powered recommendations</p>
-        </div>
-
-        <div class="main-grid">
-            <div class="sidebar">
-                <div class="card">
-                    <h2>Select Child</h2>
-                    <div class="child-selector">
-                        <select id="childSelect">
-                            <option value="">Select a child...</option>
-                        </select>
-                        <button onclick="showAddChildModal()">+ Add</button>
-                    </div>
-                </div>
-
-                <div class="card">
-                    <div class="tabs">
-                        <button class="tab active" onclick="switchTab('intake')">Daily Intake</button>
-                        <button class="tab" onclick="switchTab('opd')">OPD Report</button>
-                    </div>
-
-                    <div id="intakeTab" class="tab-content active">
-                        <form id="intakeForm">
-                            <div class="form-group">
-                                <label>Date</label>
-                                <input type="date" id="intakeDate" required>
-                            </div>
-                            
-                            <div class="form-group">
-                                <label>Meals</label>
-                                <div id="mealItems">
-                                    <div class="meal-item">
-                                        <input type="text" placeholder="Food item" class="meal-name" required>
-                                        <input type="number" placeholder="Calories" class="meal-calories" step="0.1" required>
-                                        <input type="number" placeholder="Protein (g)" class="meal-protein" step="0.1" required>
-                                        <button type="button" onclick="removeMeal(this)">×</button>
-                                    </div>
-                                </div>
-                                <button type="button" class="add-meal-btn" onclick="addMealItem()">+ Add Meal</button>
-                            </div>
-
-                            <button type="submit" class="btn">Submit Intake</button>
-                        </form>
-                    </div>
-
-                    <div id="opdTab" class="tab-content">
-                        <form id="opdForm">
-                            <div class="form-group">
-                                <label>Date</label>
-                                <input type="date" id="opdDate" required>
-                            </div>
-                            <div class="form-group">
-                                <label>Weight (kg)</label>
-                                <input type="number" id="opdWeight" step="0.1" required>
-                            </div>
-                            <div class="form-group">
-                                <label>Height (cm)</label>
-                                <input type="number" id="opdHeight" step="0.1" required>
-                            </div>
-                            <div class="form-group">
-                                <label>MUAC (cm) - Optional</label>
-                                <input type="number" id="opdMuac" step="0.1">
-                            </div>
-                            <div class="form-group">
-                                <label>Notes</label>
-                                <textarea id="opdNotes" rows="3"></textarea>
-                            </div>
-                            <button type="submit" class="btn">Submit Report</button>
-                        </form>
-                    </div>
-                </div>
-            </div>
-
-            <div class="dashboard-content">
-                <div id="noChildMessage" class="card">
-                    <h2>Welcome!</h2>
-                    <p style="color: #666; margin-top: 10px;">Please add a child to start tracking their nutrition.</p>
-                </div>
-
-                <div id="dashboardData" style="display: none;">
-                    <div class="stats-grid">
-                        <div class="stat-card">
-                            <h4>Avg Daily Calories</h4>
-                            <div class="value" id="avgCalories">-</div>
-                        </div>
-                        <div class="stat-card">
-                            <h4>Avg Daily Protein</h4>
-                            <div class="value" id="avgProtein">-</div>
-                        </div>
-                        <div class="stat-card">
-                            <h4>Latest Weight</h4>
-                            <div class="value" id="latestWeight">-</div>
-                        </div>
-                        <div class="stat-card">
-                            <h4>Growth Trend</h4>
-                            <div class="value" id="growthTrend">-</div>
-                        </div>
-                    </div>
-
-                    <div class="recommendation-card">
-                        <h3>📋 Nutritional Recommendations</h3>
-                        <div id="recommendations">
-                            <p style="color: #999;">Submit intake data to see personalized recommendations</p>
-                        </div>
-                    </div>
-
-                    <div class="card">
-                        <h3 style="color: #667eea; margin-bottom: 15px;">Recent Intake History</h3>
-                        <div id="intakeHistory" class="history-list">
-                            <p style="color: #999;">No intake records yet</p>
-                        </div>
-                    </div>
-
-                    <div class="card">
-                        <h3 style="color: #667eea; margin-bottom: 15px;">OPD Report History</h3>
-                        <div id="opdHistory" class="history-list">
-                            <p style="color: #999;">No OPD reports yet</p>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        </div>
-    </div>
-
-    <div id="addChildModal" class="modal">
-        <div class="card" style="max-width: 400px; margin: 20px;">
-            <h2>Add New Child</h2>
-            <form id="addChildForm">
-                <div class="form-group">
-                    <label>Name</label>
-                    <input type="text" id="childName" required>
-                </div>
-                <div class="form-group">
-                    <label>Date of Birth</label>
-                    <input type="date" id="childDob" required>
-                </div>
-                <div class="form-group">
-                    <label>Sex</label>
-                    <select id="childSex">
-                        <option value="male">Male</option>
-                        <option value="female">Female</option>
-                    </select>
-                </div>
-                <button type="submit" class="btn">Add Child</button>
-                <button type="button" class="btn" style="background: #999; margin-top: 10px;" onclick="hideAddChildModal()">Cancel</button>
-            </form>
-        </div>
-    </div>
-
-    <script>
-        const API_BASE = '/api';
-        let currentChildId = null;
-
-        document.getElementById('intakeDate').valueAsDate = new Date();
-        document.getElementById('opdDate').valueAsDate = new Date();
-
-        loadChildren();
-
-        function switchTab(tabName) {
-            document.querySelectorAll('.tab').forEach(t => t.classList.remove('active'));
-            document.querySelectorAll('.tab-content').forEach(c => c.classList.remove('active'));
-            
-            if (tabName === 'intake') {
-                document.querySelector('.tab:first-child').classList.add('active');
-                document.getElementById('intakeTab').classList.add('active');
-            } else {
-                document.querySelector('.tab:last-child').classList.add('active');
-                document.getElementById('opdTab').classList.add('active');
-            }
-        }
-
-        function addMealItem() {
-            const container = document.getElementById('mealItems');
-            const newItem = document.createElement('div');
-            newItem.className = 'meal-item';
-            newItem.innerHTML = `
-                <input type="text" placeholder="Food item" class="meal-name" required>
-                <input type="number" placeholder="Calories" class="meal-calories" step="0.1" required>
-                <input type="number" placeholder="Protein (g)" class="meal-protein" step="0.1" required>
-                <button type="button" onclick="removeMeal(this)">×</button>
-            `;
-            container.appendChild(newItem);
-        }
-
-        function removeMeal(btn) {
-            const items = document.querySelectorAll('.meal-item');
-            if (items.length > 1) {
-                btn.parentElement.remove();
-            }
-        }
-
-        function showAddChildModal() {
-            document.getElementById('addChildModal').classList.add('show');
-        }
-
-        function hideAddChildModal() {
-            document.getElementById('addChildModal').classList.remove('show');
-            document.getElementById('addChildForm').reset();
-        }
+def _strip_indentation(markup):
+    """Drop indentation and blank lines from markup, keeping line breaks
 
-        async function loadChildren() {
-            try {
-                const response = await fetch(`${API_BASE}/children`);
-                const children = await response.json();
-                
-                const select = document.getElementById('childSelect');
-                select.innerHTML = '<option value="">Select a child...</option>';
-                
-                children.forEach(child => {
-                    const option = document.createElement('option');
-                    option.value = child.id;
-                    option.textContent = `${child.name} (${child.age_years} years old)`;
-                    select.appendChild(option);
-                });
-
-                if (children.length > 0 && !currentChildId) {
-                    select.value = children[0].id;
-                    onChildChange();
-                }
-            } catch (error) {
-                console.error('Error loading children:', error);
-            }
-        }
-
-        document.getElementById('childSelect').addEventListener('change', onChildChange);
-
-        function onChildChange() {
-            const select = document.getElementById('childSelect');
-            currentChildId = select.value ? parseInt(select.value) : null;
-            
-            if (currentChildId) {
-                document.getElementById('noChildMessage').style.display = 'none';
-                document.getElementById('dashboardData').style.display = 'block';
-                loadDashboardData();
-            } else {
-                document.getElementById('noChildMessage').style.display = 'block';
-                document.getElementById('dashboardData').style.display = 'none';
-            }
-        }
-
-        async function loadDashboardData() {
-            if (!currentChildId) return;
-
-            try {
-                const intakeResponse = await fetch(`${API_BASE}/children/${currentChildId}/intake`);
-                const intakes = await intakeResponse.json();
-                displayIntakeHistory(intakes);
-
-                const opdResponse = await fetch(`${API_BASE}/children/${currentChildId}/opd`);
-                const opds = await opdResponse.json();
-                displayOpdHistory(opds);
-
-                calculateStats(intakes, opds);
-
-                const recResponse = await fetch(`${API_BASE}/children/${currentChildId}/recommend`);
-                const recommendations = await recResponse.json();
-                displayRecommendations(recommendations);
-            } catch (error) {
-                console.error('Error loading dashboard:', error);
-            }
-        }
-
-        function displayIntakeHistory(intakes) {
-            const container = document.getElementById('intakeHistory');
-            if (intakes.length === 0) {
-                container.innerHTML = '<p style="color: #999;">No intake records yet</p>';
-                return;
-            }
-
-            container.innerHTML = intakes.slice(-10).reverse().map(intake => `
-                <div class="history-item">
-                    <div class="date">${new Date(intake.date).toLocaleDateString()}</div>
-                    <div class="details">
-                        Calories: ${intake.total_calories.toFixed(0)} kcal | 
-                        Protein: ${intake.total_protein.toFixed(1)} g<br>
-                        <small>${intake.meal_items.join(', ')}</small>
-                    </div>
-                </div>
-            `).join('');
-        }
-
-        function displayOpdHistory(opds) {
-            const container = document.getElementById('opdHistory');
-            if (opds.length === 0) {
-                container.innerHTML = '<p style="color: #999;">No OPD reports yet</p>';
-                return;
-            }
-
-            container.innerHTML = opds.slice(-10).reverse().map(opd => `
-                <div class="history-item">
-                    <div class="date">${new Date(opd.date).toLocaleDateString()}</div>
-                    <div class="details">
-                        Weight: ${opd.weight_kg.toFixed(1)} kg | 
-                        Height: ${opd.height_cm.toFixed(1)} cm
-                        ${opd.muac_cm ? ` | MUAC: ${opd.muac_cm.toFixed(1)} cm` : ''}
-                        ${opd.notes ? `<br><small>${opd.notes}</small></small>` : ''}
-                    </div>
-                </div>
-            `).join('');
-        }
-
-        function calculateStats(intakes, opds) {
-            const avgCal = intakes.length > 0 
-                ? intakes.reduce((sum, i) => sum + i.total_calories, 0) / intakes.length 
-                : 0;
-            document.getElementById('avgCalories').textContent = avgCal.toFixed(0);
-
-            const avgProt = intakes.length > 0 
-                ? intakes.reduce((sum, i) => sum + i.total_protein, 0) / intakes.length 
-                : 0;
-            document.getElementById('avgProtein').textContent = avgProt.toFixed(1) + 'g';
-
-            if (opds.length > 0) {
-                const latest = opds[opds.length - 1];
-                document.getElementById('latestWeight').textContent = latest.weight_kg.toFixed(1) + ' kg';
-
-                if (opds.length >= 2) {
-                    const previous = opds[opds.length - 2];
-                    const diff = latest.weight_kg - previous.weight_kg;
-                    document.getElementById('growthTrend').textContent = diff >= 0 ? '↑' : '↓';
-                } else {
-                    document.getElementById('growthTrend').textContent = '-';
-                }
-            } else {
-                document.getElementById('latestWeight').textContent = '-';
-                document.getElementById('growthTrend').textContent = '-';
-            }
-        }
-
-        function displayRecommendations(data) {
-            const container = document.getElementById('recommendations');
-            if (!data || !data.suggestions || data.suggestions.length === 0) {
-                container.innerHTML = '<p style="color: #999;">No recommendations available yet. Add more data to get personalized suggestions.</p>';
-                return;
-            }
-
-            container.innerHTML = data.suggestions.map(suggestion => {
-                let alertClass = 'alert-info';
-                if (suggestion.includes('🚨') || suggestion.includes('CRITICAL')) {
-                    alertClass = 'alert-danger';
-                } else if (suggestion.includes('⚠️') || suggestion.includes('Warning') || suggestion.includes('Concern')) {
-                    alertClass = 'alert-warning';
-                } else if (suggestion.includes('✓') || suggestion.includes('Good') || suggestion.includes('Excellent')) {
-                    alertClass = 'alert-success';
-                }
-                
-                return `<div class="alert ${alertClass}">${suggestion}</div>`;
-            }).join('');
-        }
-
-        document.getElementById('addChildForm').addEventListener('submit', async (e) => {
-            e.preventDefault();
-            
-            const data = {
-                name: document.getElementById('childName').value,
-                date_of_birth: document.getElementById('childDob').value,
-                sex: document.getElementById('childSex').value
-            };
-
-            try {
-                const response = await fetch(`${API_BASE}/children`, {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify(data)
-                });
-
-                if (response.ok) {
-                    hideAddChildModal();
-                    await loadChildren();
-                    alert('Child added successfully!');
-                }
-            } catch (error) {
-                console.error('Error adding child:', error);
-                alert('Error adding child. Please try again.');
-            }
-        });
+    Newlines stay so JavaScript's automatic semicolon insertion and //
+    comments behave exactly as in the source; the page has no <pre> blocks
+    where leading whitespace would be significant.
+    """
+    lines = (line.strip() for line in markup.splitlines())
+    return b"\n".join(line for line in lines if line) + b"\n"
 
-        document.getElementById('intakeForm').addEventListener('submit', async (e) => {
-            e.preventDefault();
-            if (!currentChildId) {
-                alert('Please select a child first');
-                return;
-            }
 
-            const mealItems = Array.from(document.querySelectorAll('.meal-item')).map(item => ({
-                name: item.querySelector('.meal-name').value,
-                calories: parseFloat(item.querySelector('.meal-calories').value),
-                protein: parseFloat(item.querySelector('.meal-protein').value)
-            }));
-
-            const totalCalories = mealItems.reduce((sum, m) => sum + m.calories, 0);
-            const totalProtein = mealItems.reduce((sum, m) => sum + m.protein, 0);
-
-            const data = {
-                date: document.getElementById('intakeDate').value,
-                meal_items: mealItems.map(m => m.name),
-                total_calories: totalCalories,
-                total_protein: totalProtein
-            };
-
-            try {
-                const response = await fetch(`${API_BASE}/children/${currentChildId}/intake`, {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify(data)
-                });
-
-                if (response.ok) {
-                    const result = await response.json();
-                    displayRecommendations(result.recommendation);
-                    loadDashboardData();
-                    e.target.reset();
-                    document.getElementById('intakeDate').valueAsDate = new Date();
-                    alert('Intake recorded successfully!');
-                }
-            } catch (error) {
-                console.error('Error submitting intake:', error);
-                alert('Error recording intake. Please try again.');
-            }
-        });
+# The dashboard is a static page: read it once at import and serve the bytes
+# (and a gzipped copy) from memory, with ETags for revalidation
+with open(os.path.join(app.static_folder, "dashboard.html"), "rb") as f:
+    INDEX_BYTES = _strip_indentation(f.read())
+INDEX_ETAG = hashlib.md5(INDEX_BYTES).hexdigest()
+# mtime=0 keeps the compressed bytes (and so their ETag) stable across restarts
+INDEX_GZIP = gzip.compress(INDEX_BYTES, compresslevel=9, mtime=0)
+INDEX_GZIP_ETAG = INDEX_ETAG + "-gzip"
 
-        document.getElementById('opdForm').addEventListener('submit', async (e) => {
-            e.preventDefault();
-            if (!currentChildId) {
-                alert('Please select a child first');
-                return;
-            }
 
-            const data = {
-                date: document.getElementById('opdDate').value,
-                weight_kg: parseFloat(document.getElementById('opdWeight').value),
-                height_cm: parseFloat(document.getElementById('opdHeight').value),
-                muac_cm: document.getElementById('opdMuac').value ? parseFloat(document.getElementById('opdMuac').value) : null,
-                notes: document.getElementById('opdNotes').value
-            };
-
-            try {
-                const response = await fetch(`${API_BASE}/children/${currentChildId}/opd`, {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify(data)
-                });
-
-                if (response.ok) {
-                    const result = await response.json();
-                    displayRecommendations(result.recommendation);
-                    loadDashboardData();
-                    e.target.reset();
-                    document.getElementById('opdDate').valueAsDate = new Date();
-                    alert('OPD report recorded successfully!');
-                }
-            } catch (error) {
-                console.error('Error submitting OPD:', error);
-                alert('Error recording OPD report. Please try again.');
-            }
-        });
-    </script>
-</body>
-</html>
-    """
-    return render_template_string(html)
+@app.route("/")
+def index():
+    """Serve the main dashboard"""
+    if _accepts_gzip():
+        response = app.response_class(INDEX_GZIP, mimetype="text/html")
+        response.content_encoding = "gzip"
+        response.set_etag(INDEX_GZIP_ETAG)
+    else:
+        response = app.response_class(INDEX_BYTES, mimetype="text/html")
+        response.set_etag(INDEX_ETAG)
+    response.vary.add("Accept-Encoding")
+    response.cache_control.public = True
+    response.cache_control.max_age = 3600
+    return response.make_conditional(request)
 
 
 # ==================== ERROR HANDLERS ====================
 
 @app.errorhandler(404)
 def not_found(error):
-    return jsonify({"error": "Resource not found"}), 404
+    return _json({"error": "Resource not found"}, 404)
 
 
 @app.errorhandler(500)
 def internal_error(error):
     db.session.rollback()
-    return jsonify({"error": "Internal server error"}), 500
+    return _json({"error": "Internal server error"}, 500)
 
 
 # ==================== RUN APPLICATION ====================
@@ -1100,6 +692,7 @@ if __name__ == "__main__":
     print("\nStarting Flask server...")
     print("Dashboard available at: http://localhost:5000")
     print("API available at: http://localhost:5000/api")
+    print("For production use: gunicorn -w 4 -k gthread --threads 4 wsgi:app")
     print("\nPress CTRL+C to stop the server\n")
     
-    app.run(debug=True, port=5000, host='0.0.0.0')
\ No newline at end of file
+    app.run(debug=os.environ.get("FLASK_DEBUG") == "1", port=5000, host='0.0.0.0')
\ No newline at end of file
@@ -2,7 +2,9 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import date, datetime
 
-db = SQLAlchemy()
+# Handlers serialize objects right after committing them; keeping their
+# loaded state avoids a refresh SELECT per write
+db = SQLAlchemy(session_options={"expire_on_commit": False})
 
 class Child(db.Model):
     __tablename__ = 'children'
@@ -13,46 +15,65 @@ class Child(db.Model):
     sex = db.Column(db.String(10), default='unknown')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    # Relationships
-    intakes = db.relationship('DailyIntake', backref='child', lazy=True, cascade='all, delete-orphan')
-    opd_reports = db.relationship('OPDReport', backref='child', lazy=True, cascade='all, delete-orphan')
+    # Relationships (lazy='raise': load explicitly with selectinload or a query,
+    # so an accidental per-row lazy load fails loudly instead of adding N+1 SELECTs)
+    intakes = db.relationship('DailyIntake', back_populates='child', lazy='raise',
+                              cascade='all, delete-orphan', order_by='DailyIntake.date.desc()')
+    opd_reports = db.relationship('OPDReport', back_populates='child', lazy='raise',
+                                  cascade='all, delete-orphan', order_by='OPDReport.date.asc()')
+    recommendation_cache = db.relationship('RecommendationCache', lazy=True, uselist=False,
+                                           cascade='all, delete-orphan')
     
-    def to_dict(self):
-        age = (date.today() - self.date_of_birth).days / 365.25
+    @staticmethod
+    def row_to_dict(row):
+        """Serialize a Child or a (id, name, date_of_birth, sex) column row"""
+        age = (date.today() - row.date_of_birth).days / 365.25
         return {
-            'id': self.id,
-            'name': self.name,
-            'date_of_birth': self.date_of_birth.isoformat(),
-            'sex': self.sex,
+            'id': row.id,
+            'name': row.name,
+            'date_of_birth': row.date_of_birth,
+            'sex': row.sex,
             'age_years': round(age, 1),
             'age_months': round(age * 12, 1)
         }
+    
+    def to_dict(self):
+        return self.row_to_dict(self)
 
 
 class DailyIntake(db.Model):
     __tablename__ = 'daily_intakes'
+    __table_args__ = (db.Index('ix_intake_child_date', 'child_id', 'date'),)
     
     id = db.Column(db.Integer, primary_key=True)
     child_id = db.Column(db.Integer, db.ForeignKey('children.id'), nullable=False)
     date = db.Column(db.Date, nullable=False)
-    meal_items = db.Column(db.JSON)  # List of meal item names
+    meal_items = db.Column(db.JSON, default=list)  # List of meal item names
     total_calories = db.Column(db.Float, default=0.0)
     total_protein = db.Column(db.Float, default=0.0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    def to_dict(self):
+    child = db.relationship('Child', back_populates='intakes')
+    
+    @staticmethod
+    def row_to_dict(row):
+        """Serialize a DailyIntake or a column row with the same names"""
         return {
-            'id': self.id,
-            'child_id': self.child_id,
-            'date': self.date.isoformat(),
-            'meal_items': self.meal_items or [],
-            'total_calories': self.total_calories,
-            'total_protein': self.total_protein
+            'id': row.id,
+            'child_id': row.child_id,
+            'date': row.date,
+            'meal_items': row.meal_items or [],
+            'total_calories': row.total_calories,
+            'total_protein': row.total_protein
         }
+    
+    def to_dict(self):
+        return self.row_to_dict(self)
 
 
 class OPDReport(db.Model):
     __tablename__ = 'opd_reports'
+    __table_args__ = (db.Index('ix_opd_child_date', 'child_id', 'date'),)
     
     id = db.Column(db.Integer, primary_key=True)
     child_id = db.Column(db.Integer, db.ForeignKey('children.id'), nullable=False)
@@ -63,13 +84,30 @@ class OPDReport(db.Model):
     notes = db.Column(db.Text, default='')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    def to_dict(self):
+    child = db.relationship('Child', back_populates='opd_reports')
+    
+    @staticmethod
+    def row_to_dict(row):
+        """Serialize an OPDReport or a column row with the same names"""
         return {
-            'id': self.id,
-            'child_id': self.child_id,
-            'date': self.date.isoformat(),
-            'weight_kg': self.weight_kg,
-            'height_cm': self.height_cm,
-            'muac_cm': self.muac_cm,
-            'notes': self.notes
-        }
\ No newline at end of file
+            'id': row.id,
+            'child_id': row.child_id,
+            'date': row.date,
+            'weight_kg': row.weight_kg,
+            'height_cm': row.height_cm,
+            'muac_cm': row.muac_cm,
+            'notes': row.notes
+        }
+    
+    def to_dict(self):
+        return self.row_to_dict(self)
+
+
+class RecommendationCache(db.Model):
+    __tablename__ = 'recommendation_cache'
+    
+    child_id = db.Column(db.Integer, db.ForeignKey('children.id'), primary_key=True)
+    # Child created_at, intake/OPD tips and the day the payload was computed for
+    version = db.Column(db.String(160), nullable=False)
+    payload = db.Column(db.JSON, nullable=False)  # evaluate_intake() result
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -1,35 +1,38 @@
 # recommender.py
+from bisect import bisect_right
 from datetime import datetime, date
+import heapq
 
-def calculate_age_in_months(date_of_birth):
-    """Calculate age in months from date of birth"""
-    if isinstance(date_of_birth, str):
-        dob = datetime.fromisoformat(date_of_birth).date()
-    else:
-        dob = date_of_birth
+def _as_date(value):
+    """Accept either an ISO date string or a date object"""
+    if isinstance(value, str):
+        # Plain YYYY-MM-DD parses straight to a date; only full timestamps
+        # need the intermediate datetime
+        if "T" in value or " " in value:
+            return datetime.fromisoformat(value).date()
+        return date.fromisoformat(value)
+    return value
+
+# Upper bounds (months, exclusive) of the age bands shared by the
+# calorie and protein tables; the last entry of each table covers 120+
+AGE_BANDS_MONTHS = (6, 12, 24, 36, 60, 84, 120)
+CALORIES_BY_BAND = (650, 850, 1000, 1200, 1400, 1600, 1800, 2000)
+PROTEIN_G_BY_BAND = (10, 14, 16, 20, 24, 28, 32, 40)
+
+def calculate_age_in_months(date_of_birth, today=None):
+    """Calculate age in months from date of birth (as of today unless given)"""
+    dob = _as_date(date_of_birth)
     
-    today = date.today()
+    if today is None:
+        today = date.today()
     age_months = (today.year - dob.year) * 12 + (today.month - dob.month)
     return age_months
 
 def get_calorie_requirements(age_months, sex='unknown'):
     """Get daily calorie requirements based on age"""
-    if age_months < 6:
-        return 650  # 0-6 months (breastfeeding + complementary)
-    elif age_months < 12:
-        return 850  # 6-12 months
-    elif age_months < 24:
-        return 1000  # 1-2 years
-    elif age_months < 36:
-        return 1200  # 2-3 years
-    elif age_months < 60:
-        return 1400  # 3-5 years
-    elif age_months < 84:
-        return 1600  # 5-7 years
-    elif age_months < 120:
-        return 1800  # 7-10 years
-    else:
-        return 2000  # 10+ years
+    # 0-6 months is breastfeeding + complementary, then 6-12 months,
+    # 1-2, 2-3, 3-5, 5-7, 7-10 and 10+ years
+    return CALORIES_BY_BAND[bisect_right(AGE_BANDS_MONTHS, age_months)]
 
 def get_protein_requirements(age_months, weight_kg=None):
     """Get daily protein requirements in grams"""
@@ -38,28 +41,13 @@ def get_protein_requirements(age_months, weight_kg=None):
         return weight_kg * 1.2
     
     # Fallback to age-based estimates
-    if age_months < 6:
-        return 10
-    elif age_months < 12:
-        return 14
-    elif age_months < 24:
-        return 16
-    elif age_months < 36:
-        return 20
-    elif age_months < 60:
-        return 24
-    elif age_months < 84:
-        return 28
-    elif age_months < 120:
-        return 32
-    else:
-        return 40
+    return PROTEIN_G_BY_BAND[bisect_right(AGE_BANDS_MONTHS, age_months)]
 
 def calculate_bmi(weight_kg, height_cm):
     """Calculate BMI"""
     if height_cm > 0:
-        height_m = height_cm / 100
-        return weight_kg / (height_m ** 2)
+        # kg / m^2 with the cm -> m conversion folded into one constant
+        return weight_kg * 10000.0 / (height_cm * height_cm)
     return 0
 
 def assess_growth_status(age_months, weight_kg, height_cm, muac_cm=None):
@@ -104,219 +92,311 @@ def assess_growth_status(age_months, weight_kg, height_cm, muac_cm=None):
     
     return issues, bmi, weight_ratio
 
-def evaluate_intake(child, recent_intakes, opd_reports):
+def summarize_intakes(recent_intakes):
+    """Average daily (calories, protein) over a list of intake dicts"""
+    if not recent_intakes:
+        return 0, 0
+    total_calories = 0
+    total_protein = 0
+    for intake in recent_intakes:
+        total_calories += intake['total_calories']
+        total_protein += intake['total_protein']
+    n = len(recent_intakes)
+    return total_calories / n, total_protein / n
+
+def _report_date(report):
+    """Sort key for OPD report dicts"""
+    return _as_date(report['date'])
+
+def calculate_growth(previous_opd, latest_opd):
+    """Weight change (kg), height change (cm) and elapsed months between two OPD reports"""
+    weight_change = latest_opd['weight_kg'] - previous_opd['weight_kg']
+    height_change = latest_opd['height_cm'] - previous_opd['height_cm']
+    date_diff = (_as_date(latest_opd['date']) - _as_date(previous_opd['date'])).days
+    return weight_change, height_change, date_diff / 30
+
+def get_expected_growth_rates(age_months):
+    """Expected monthly (weight kg, height cm) gain for a given age"""
+    if age_months < 12:
+        return 0.4, 2.5
+    elif age_months < 24:
+        return 0.25, 1.5
+    else:
+        return 0.2, 0.7
+
+# Suggestion templates, formatted only for the branch that applies. Each
+# group is keyed by outcome so callers can tell which message was chosen.
+CALORIE_MESSAGES = {
+    'urgent': (
+        "⚠️ URGENT: Your child is consuming only {pct:.0f}% of their daily calorie needs "
+        "({avg:.0f} out of {req} calories). This is critically low. "
+        "Please increase portion sizes and add calorie-rich foods like bananas, peanut butter, and full-fat milk."
+    ),
+    'low': (
+        "⚠️ Warning: Your child is getting {pct:.0f}% of recommended calories "
+        "({avg:.0f} out of {req} calories). "
+        "Try adding healthy snacks between meals like fruits, nuts, and yogurt."
+    ),
+    'near': (
+        "✓ Good progress! Your child is consuming {pct:.0f}% of their daily calorie needs "
+        "({avg:.0f} out of {req} calories). "
+        "Just a little more to reach the ideal amount."
+    ),
+    'met': (
+        "✓ Excellent! Your child is meeting their calorie needs perfectly "
+        "({avg:.0f} calories daily). Keep up the good work!"
+    ),
+    'high': (
+        "⚠️ Note: Your child is consuming {pct:.0f}% of recommended calories "
+        "({avg:.0f} out of {req} calories). "
+        "This is slightly high. Focus on nutrient-dense foods rather than empty calories."
+    ),
+}
+
+PROTEIN_MESSAGES = {
+    'urgent': (
+        "⚠️ URGENT: Protein intake is very low at {avg:.1f}g daily "
+        "(needs {req:.0f}g). Add protein-rich foods like eggs, dal, milk, chicken, or fish to every meal."
+    ),
+    'low': (
+        "⚠️ Protein intake is below recommended levels ({avg:.1f}g out of {req:.0f}g daily). "
+        "Include more lentils, eggs, paneer, or lean meat in the diet."
+    ),
+    'met': (
+        "✓ Great! Protein intake is adequate at {avg:.1f}g daily "
+        "({pct:.0f}% of {req:.0f}g requirement)."
+    ),
+    'high': (
+        "✓ Protein intake is good at {avg:.1f}g daily. This is {pct:.0f}% of the requirement."
+    ),
+}
+
+NO_INTAKE_MESSAGE = (
+    "ℹ️ No recent intake data available. For a child aged {age_years:.1f} years, "
+    "aim for {calorie_req} calories and {protein_req:.0f}g protein daily."
+)
+
+WEIGHT_MESSAGES = {
+    'severe_underweight': (
+        "🚨 CRITICAL: Your child's weight ({weight:.1f}kg) is significantly below normal for their age. "
+        "Please consult a pediatrician immediately. Increase meal frequency to 5-6 times daily with calorie-dense foods."
+    ),
+    'underweight': (
+        "⚠️ Your child's weight ({weight:.1f}kg) is below the healthy range. "
+        "Focus on nutritious, calorie-rich foods and consider consulting a nutritionist."
+    ),
+    'overweight': (
+        "⚠️ Your child's weight ({weight:.1f}kg, BMI: {bmi:.1f}) is above the healthy range. "
+        "Focus on balanced meals with vegetables, limit sweets and fried foods, and encourage physical activity."
+    ),
+    'healthy': (
+        "✓ Your child's weight ({weight:.1f}kg) is in a healthy range for their age. "
+        "Continue maintaining a balanced diet!"
+    ),
+}
+
+MUAC_MESSAGES = {
+    'severe_acute_malnutrition': (
+        "🚨 CRITICAL: MUAC measurement ({muac:.1f}cm) indicates severe acute malnutrition. "
+        "Immediate medical intervention is required. Please visit a health facility urgently."
+    ),
+    'moderate_acute_malnutrition': (
+        "⚠️ MUAC measurement ({muac:.1f}cm) shows moderate acute malnutrition. "
+        "Increase protein and calorie intake immediately and monitor weekly."
+    ),
+}
+
+GROWTH_MESSAGES = {
+    'slow_weight': (
+        "⚠️ Growth Concern: Weight gain is slow ({weight_change:.2f}kg in {months:.1f} months). "
+        "Expected gain is around {expected:.1f}kg per month at this age. "
+        "Increase meal frequency and calorie intake."
+    ),
+    'good_weight': (
+        "✓ Good Growth! Your child has gained {weight_change:.2f}kg over {months:.1f} months, "
+        "which is healthy. Keep maintaining the current nutrition pattern."
+    ),
+    'slow_height': (
+        "⚠️ Height growth is slower than expected ({height_change:.1f}cm in {months:.1f} months). "
+        "Ensure adequate protein, calcium, and vitamin D intake. Consider adding milk, eggs, and leafy greens."
+    ),
+}
+
+NO_OPD_MESSAGE = (
+    "ℹ️ No OPD measurements recorded yet. Please add weight, height, and MUAC measurements "
+    "to get comprehensive growth assessments."
+)
+
+DIET_TIPS = {
+    'infant': (
+        "ℹ️ For infants under 6 months: Continue exclusive breastfeeding. "
+        "Consult your pediatrician before starting any complementary foods."
+    ),
+    'weaning': (
+        "ℹ️ For 6-12 months: Introduce mashed foods like rice cereal, mashed vegetables, "
+        "pureed fruits, and well-cooked dal. Continue breastfeeding alongside solid foods."
+    ),
+    'toddler': (
+        "ℹ️ For 1-2 years: Offer a variety of soft, chopped foods. Include rice, dal, vegetables, "
+        "fruits, eggs, and milk. Feed 5-6 times daily in small portions."
+    ),
+    'general': (
+        "ℹ️ General tip: Ensure a balanced plate with whole grains, proteins (dal/eggs/meat), "
+        "vegetables, fruits, and dairy. Limit processed foods and sugary drinks."
+    ),
+}
+
+ON_TRACK_MESSAGE = (
+    "🎉 Overall, your child's nutrition is on track! Continue with the current diet pattern "
+    "and maintain regular health check-ups."
+)
+
+def evaluate_intake(child, recent_intakes, opd_reports, stats=None, today=None, opd_sorted=True):
     """
     Main evaluation function that generates human-readable recommendations
     
     Args:
         child: dict with child info (date_of_birth, sex)
         recent_intakes: list of recent daily intake dicts (last 7 days)
-        opd_reports: list of all OPD report dicts
+        opd_reports: OPD report dicts in date order; only the last two are read
+        stats: optional precomputed (avg_calories, avg_protein) for
+            recent_intakes, as returned by summarize_intakes()
+        today: optional date to compute the child's age against (defaults
+            to date.today())
+        opd_sorted: pass False if opd_reports may be in any order; the
+            latest two are then picked by date without a full sort
     
     Returns:
         dict with suggestions and analysis
     """
-    suggestions = []
+    # (template, fields) per suggestion; the text is rendered once at the end
+    messages = []
     
     # Calculate child's age
-    age_months = calculate_age_in_months(child['date_of_birth'])
+    age_months = calculate_age_in_months(child['date_of_birth'], today)
     age_years = age_months / 12
     
-    # Get latest OPD report
-    latest_opd = opd_reports[-1] if opd_reports else None
-    
-    # Get nutritional requirements
-    calorie_req = get_calorie_requirements(age_months, child.get('sex'))
+    if not opd_sorted:
+        opd_reports = heapq.nlargest(2, opd_reports, key=_report_date)[::-1]
     
+    # Get latest OPD report and read its measurements once
+    latest_opd = opd_reports[-1] if opd_reports else None
     if latest_opd:
         weight_kg = latest_opd['weight_kg']
-        protein_req = get_protein_requirements(age_months, weight_kg)
+        height_cm = latest_opd['height_cm']
+        muac_cm = latest_opd.get('muac_cm')
     else:
-        weight_kg = None
-        protein_req = get_protein_requirements(age_months)
+        weight_kg = height_cm = muac_cm = None
+    
+    # Get nutritional requirements (protein falls back to age when unweighed)
+    calorie_req = get_calorie_requirements(age_months, child.get('sex'))
+    protein_req = get_protein_requirements(age_months, weight_kg)
     
     # Analyze recent intake
+    avg_calories, avg_protein = stats if stats is not None else summarize_intakes(recent_intakes)
     if recent_intakes:
-        avg_calories = sum(i['total_calories'] for i in recent_intakes) / len(recent_intakes)
-        avg_protein = sum(i['total_protein'] for i in recent_intakes) / len(recent_intakes)
         
         # Calorie assessment
         calorie_percentage = (avg_calories / calorie_req) * 100
         
         if calorie_percentage < 70:
-            suggestions.append(
-                f"⚠️ URGENT: Your child is consuming only {calorie_percentage:.0f}% of their daily calorie needs "
-                f"({avg_calories:.0f} out of {calorie_req} calories). This is critically low. "
-                f"Please increase portion sizes and add calorie-rich foods like bananas, peanut butter, and full-fat milk."
-            )
+            outcome = 'urgent'
         elif calorie_percentage < 85:
-            suggestions.append(
-                f"⚠️ Warning: Your child is getting {calorie_percentage:.0f}% of recommended calories "
-                f"({avg_calories:.0f} out of {calorie_req} calories). "
-                f"Try adding healthy snacks between meals like fruits, nuts, and yogurt."
-            )
+            outcome = 'low'
         elif calorie_percentage < 95:
-            suggestions.append(
-                f"✓ Good progress! Your child is consuming {calorie_percentage:.0f}% of their daily calorie needs "
-                f"({avg_calories:.0f} out of {calorie_req} calories). "
-                f"Just a little more to reach the ideal amount."
-            )
+            outcome = 'near'
         elif calorie_percentage <= 110:
-            suggestions.append(
-                f"✓ Excellent! Your child is meeting their calorie needs perfectly "
-                f"({avg_calories:.0f} calories daily). Keep up the good work!"
-            )
+            outcome = 'met'
         else:
-            suggestions.append(
-                f"⚠️ Note: Your child is consuming {calorie_percentage:.0f}% of recommended calories "
-                f"({avg_calories:.0f} out of {calorie_req} calories). "
-                f"This is slightly high. Focus on nutrient-dense foods rather than empty calories."
-            )
+            outcome = 'high'
+        messages.append((CALORIE_MESSAGES[outcome], dict(
+            pct=calorie_percentage, avg=avg_calories, req=calorie_req
+        )))
         
         # Protein assessment
         protein_percentage = (avg_protein / protein_req) * 100
         
         if protein_percentage < 70:
-            suggestions.append(
-                f"⚠️ URGENT: Protein intake is very low at {avg_protein:.1f}g daily "
-                f"(needs {protein_req:.0f}g). Add protein-rich foods like eggs, dal, milk, chicken, or fish to every meal."
-            )
+            outcome = 'urgent'
         elif protein_percentage < 85:
-            suggestions.append(
-                f"⚠️ Protein intake is below recommended levels ({avg_protein:.1f}g out of {protein_req:.0f}g daily). "
-                f"Include more lentils, eggs, paneer, or lean meat in the diet."
-            )
+            outcome = 'low'
         elif protein_percentage <= 110:
-            suggestions.append(
-                f"✓ Great! Protein intake is adequate at {avg_protein:.1f}g daily "
-                f"({protein_percentage:.0f}% of {protein_req:.0f}g requirement)."
-            )
+            outcome = 'met'
         else:
-            suggestions.append(
-                f"✓ Protein intake is good at {avg_protein:.1f}g daily. This is {protein_percentage:.0f}% of the requirement."
-            )
+            outcome = 'high'
+        messages.append((PROTEIN_MESSAGES[outcome], dict(
+            pct=protein_percentage, avg=avg_protein, req=protein_req
+        )))
     else:
-        suggestions.append(
-            f"ℹ️ No recent intake data available. For a child aged {age_years:.1f} years, "
-            f"aim for {calorie_req} calories and {protein_req:.0f}g protein daily."
-        )
+        messages.append((NO_INTAKE_MESSAGE, dict(
+            age_years=age_years, calorie_req=calorie_req, protein_req=protein_req
+        )))
     
     # Analyze growth from OPD reports
     if latest_opd:
-        weight_kg = latest_opd['weight_kg']
-        height_cm = latest_opd['height_cm']
-        muac_cm = latest_opd.get('muac_cm')
-        
         issues, bmi, weight_ratio = assess_growth_status(age_months, weight_kg, height_cm, muac_cm)
         
         if "severe_underweight" in issues:
-            suggestions.append(
-                f"🚨 CRITICAL: Your child's weight ({weight_kg:.1f}kg) is significantly below normal for their age. "
-                f"Please consult a pediatrician immediately. Increase meal frequency to 5-6 times daily with calorie-dense foods."
-            )
+            outcome = 'severe_underweight'
         elif "underweight" in issues:
-            suggestions.append(
-                f"⚠️ Your child's weight ({weight_kg:.1f}kg) is below the healthy range. "
-                f"Focus on nutritious, calorie-rich foods and consider consulting a nutritionist."
-            )
+            outcome = 'underweight'
         elif "overweight" in issues or "overweight_bmi" in issues:
-            suggestions.append(
-                f"⚠️ Your child's weight ({weight_kg:.1f}kg, BMI: {bmi:.1f}) is above the healthy range. "
-                f"Focus on balanced meals with vegetables, limit sweets and fried foods, and encourage physical activity."
-            )
+            outcome = 'overweight'
         else:
-            suggestions.append(
-                f"✓ Your child's weight ({weight_kg:.1f}kg) is in a healthy range for their age. "
-                f"Continue maintaining a balanced diet!"
-            )
+            outcome = 'healthy'
+        messages.append((WEIGHT_MESSAGES[outcome], dict(weight=weight_kg, bmi=bmi)))
         
         if "severe_acute_malnutrition" in issues:
-            suggestions.append(
-                f"🚨 CRITICAL: MUAC measurement ({muac_cm:.1f}cm) indicates severe acute malnutrition. "
-                f"Immediate medical intervention is required. Please visit a health facility urgently."
-            )
+            messages.append((MUAC_MESSAGES['severe_acute_malnutrition'], dict(muac=muac_cm)))
         elif "moderate_acute_malnutrition" in issues:
-            suggestions.append(
-                f"⚠️ MUAC measurement ({muac_cm:.1f}cm) shows moderate acute malnutrition. "
-                f"Increase protein and calorie intake immediately and monitor weekly."
-            )
+            messages.append((MUAC_MESSAGES['moderate_acute_malnutrition'], dict(muac=muac_cm)))
         
         # Growth trend analysis
         if len(opd_reports) >= 2:
             previous_opd = opd_reports[-2]
-            weight_change = weight_kg - previous_opd['weight_kg']
-            height_change = height_cm - previous_opd['height_cm']
-            
-            date_diff = (datetime.fromisoformat(latest_opd['date']) - 
-                        datetime.fromisoformat(previous_opd['date'])).days
-            months_diff = date_diff / 30
+            weight_change, height_change, months_diff = calculate_growth(previous_opd, latest_opd)
             
             if months_diff > 0:
                 monthly_weight_gain = weight_change / months_diff
                 monthly_height_gain = height_change / months_diff
                 
-                # Expected growth rates
-                if age_months < 12:
-                    expected_weight_gain = 0.4  # kg per month
-                    expected_height_gain = 2.5  # cm per month
-                elif age_months < 24:
-                    expected_weight_gain = 0.25
-                    expected_height_gain = 1.5
-                else:
-                    expected_weight_gain = 0.2
-                    expected_height_gain = 0.7
+                expected_weight_gain, expected_height_gain = get_expected_growth_rates(age_months)
                 
                 if monthly_weight_gain < expected_weight_gain * 0.5:
-                    suggestions.append(
-                        f"⚠️ Growth Concern: Weight gain is slow ({weight_change:.2f}kg in {months_diff:.1f} months). "
-                        f"Expected gain is around {expected_weight_gain:.1f}kg per month at this age. "
-                        f"Increase meal frequency and calorie intake."
-                    )
+                    messages.append((GROWTH_MESSAGES['slow_weight'], dict(
+                        weight_change=weight_change, months=months_diff, expected=expected_weight_gain
+                    )))
                 elif monthly_weight_gain >= expected_weight_gain * 0.8:
-                    suggestions.append(
-                        f"✓ Good Growth! Your child has gained {weight_change:.2f}kg over {months_diff:.1f} months, "
-                        f"which is healthy. Keep maintaining the current nutrition pattern."
-                    )
+                    messages.append((GROWTH_MESSAGES['good_weight'], dict(
+                        weight_change=weight_change, months=months_diff
+                    )))
                 
                 if monthly_height_gain < expected_height_gain * 0.5 and age_months < 60:
-                    suggestions.append(
-                        f"⚠️ Height growth is slower than expected ({height_change:.1f}cm in {months_diff:.1f} months). "
-                        f"Ensure adequate protein, calcium, and vitamin D intake. Consider adding milk, eggs, and leafy greens."
-                    )
+                    messages.append((GROWTH_MESSAGES['slow_height'], dict(
+                        height_change=height_change, months=months_diff
+                    )))
     else:
-        suggestions.append(
-            "ℹ️ No OPD measurements recorded yet. Please add weight, height, and MUAC measurements "
-            "to get comprehensive growth assessments."
-        )
+        messages.append((NO_OPD_MESSAGE, None))
     
     # General dietary recommendations
     if age_months < 6:
-        suggestions.append(
-            "ℹ️ For infants under 6 months: Continue exclusive breastfeeding. "
-            "Consult your pediatrician before starting any complementary foods."
-        )
+        messages.append((DIET_TIPS['infant'], None))
     elif age_months < 12:
-        suggestions.append(
-            "ℹ️ For 6-12 months: Introduce mashed foods like rice cereal, mashed vegetables, "
-            "pureed fruits, and well-cooked dal. Continue breastfeeding alongside solid foods."
-        )
+        messages.append((DIET_TIPS['weaning'], None))
     elif age_months < 24:
-        suggestions.append(
-            "ℹ️ For 1-2 years: Offer a variety of soft, chopped foods. Include rice, dal, vegetables, "
-            "fruits, eggs, and milk. Feed 5-6 times daily in small portions."
-        )
+        messages.append((DIET_TIPS['toddler'], None))
     else:
-        suggestions.append(
-            "ℹ️ General tip: Ensure a balanced plate with whole grains, proteins (dal/eggs/meat), "
-            "vegetables, fruits, and dairy. Limit processed foods and sugary drinks."
-        )
+        messages.append((DIET_TIPS['general'], None))
+    
+    # If no issues found and everything looks good (the fields are all
+    # numbers, so the templates alone decide this)
+    if all('✓' in template for template, _ in messages):
+        messages.append((ON_TRACK_MESSAGE, None))
     
-    # If no issues found and everything looks good
-    if not suggestions or all('✓' in s for s in suggestions):
-        suggestions.append(
-            "🎉 Overall, your child's nutrition is on track! Continue with the current diet pattern "
-            "and maintain regular health check-ups."
-        )
+    suggestions = [
+        template.format_map(fields) if fields else template
+        for template, fields in messages
+    ]
     
     return {
         "suggestions": suggestions,
@@ -324,7 +404,7 @@ def evaluate_intake(child, recent_intakes, opd_reports):
         "calorie_requirement": calorie_req,
         "protein_requirement": protein_req,
         "average_intake": {
-            "calories": sum(i['total_calories'] for i in recent_intakes) / len(recent_intakes) if recent_intakes else 0,
-            "protein": sum(i['total_protein'] for i in recent_intakes) / len(recent_intakes) if recent_intakes else 0
+            "calories": avg_calories,
+            "protein": avg_protein
         }
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,6 @@
+# wsgi.py
+"""WSGI entry point for production servers
+
+    gunicorn -w 4 -k gthread --threads 4 wsgi:app
+"""
+from app import app